@@ -1,31 +1,162 @@
 from http.client import HTTPException
-import re
-from traceback import format_tb
+import hashlib
+import math
+import random
+import time
 from flask import Flask, request, abort, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-from sqlalchemy.sql.expression import func
+import orjson
+from sqlalchemy import Integer, all_, bindparam, func, lambda_stmt, \
+    select, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSON, aggregate_order_by
 
-from models import setup_db, Question, Category
+from models import setup_db, db, Question, Category
 
 QUESTIONS_PER_PAGE = 10
+# largest OFFSET Postgres accepts (bigint)
+MAX_OFFSET = 2 ** 63 - 1
+
+# escapes LIKE wildcards so search terms are matched literally
+LIKE_ESCAPE = str.maketrans({'\\': '\\\\', '%': '\\%', '_': '\\_'})
+
+# JSON provider backed by orjson, which serializes straight to bytes
+
+
+class OrjsonProvider(JSONProvider):
+    # categories are keyed by integer id, and keys are sorted so output is
+    # deterministic; orjson sorts integer keys as strings ("10" before "2")
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+    mimetype = 'application/json'
+
+    def _options(self, kwargs):
+        # maps the json.dumps arguments orjson can honour onto its options
+        option = self.option
+        if not kwargs.pop('sort_keys', True):
+            option &= ~orjson.OPT_SORT_KEYS
+        indent = kwargs.pop('indent', None)
+        if indent is not None:
+            if indent != 2:
+                raise TypeError('orjson only supports an indent of 2')
+            option |= orjson.OPT_INDENT_2
+        if kwargs:
+            raise TypeError('Unsupported orjson arguments: '
+                            + ', '.join(sorted(kwargs)))
+        return option
+
+    def dumps(self, obj, **kwargs):
+        default = kwargs.pop('default', None)
+        return orjson.dumps(obj, default=default,
+                            option=self._options(kwargs)).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            raise TypeError('Unsupported orjson arguments: '
+                            + ', '.join(sorted(kwargs)))
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.option),
+            mimetype=self.mimetype)
+
+
+# utilities for HTTP caching
+
+
+def make_etag(*parts):
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def cacheable(response, etag, max_age=None):
+    # without max_age clients must revalidate, which the ETag makes cheap
+    response.set_etag(etag)
+    response.cache_control.public = True
+    if max_age is None:
+        response.cache_control.no_cache = True
+    else:
+        response.cache_control.max_age = max_age
+    return response.make_conditional(request)
+
+
+# categories are near-static reference data, so they are cached in-process
+CATEGORY_CACHE_TTL = 300
+_category_cache = {'data': None, 'etag': None, 'ts': 0}
+
+
+def get_categories_cached(ttl=CATEGORY_CACHE_TTL):
+    now = time.monotonic()
+    if _category_cache['data'] is None or now - _category_cache['ts'] > ttl:
+        # only the two columns are needed, so skip building ORM objects
+        rows = db.session.query(Category.id, Category.type).all()
+        _category_cache['data'] = [{'id': id, 'type': type}
+                                   for id, type in rows]
+        _category_cache['etag'] = make_etag(_category_cache['data'])
+        _category_cache['ts'] = now
+
+    return _category_cache['data']
+
+
+# utility for validating quiz request values
+# previous question ids are bound as a Postgres integer array
+INTEGER_MIN = -2 ** 31
+INTEGER_MAX = 2 ** 31 - 1
+
+
+def is_int(value):
+    # bool is a subclass of int, but true/false are not valid ids or positions
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# utility for mapping a quiz cursor position to a question offset
+# index -> (a * index + b) % total is a permutation of 0..total-1 whenever
+# a is coprime to total, so a seeded a and b give each quiz its own order
+# without storing or shuffling the question ids.
+
+
+def quiz_position(seed, index, total):
+    rng = random.Random(seed)
+    a = rng.randrange(1, total) if total > 1 else 1
+    while math.gcd(a, total) != 1:
+        a = rng.randrange(1, total)
+    b = rng.randrange(total)
+    return (a * index + b) % total
+
 
 # utility for paginating questions
+# The page is cut with LIMIT/OFFSET so only one page of rows is fetched.
+# OFFSET still makes the database walk the skipped rows, so very deep
+# pages would be better served by keyset pagination
+# (WHERE id > :last_id ORDER BY id LIMIT n).
+# Postgres builds the page as a JSON array itself, so no ORM objects are
+# created just to be formatted; these are the keys it writes per question.
+QUESTION_FIELDS = ('id', 'question', 'answer', 'category', 'difficulty')
 
 
-def paginate_questions(request, selection):
+def paginate_questions(request, query):
     page = request.args.get('page', 1, type=int)
     start = (page - 1) * QUESTIONS_PER_PAGE
-    end = start + QUESTIONS_PER_PAGE
+    # pages start at 1, and an offset past bigint cannot hold any rows;
+    # an empty page lets the caller respond with 404
+    if page < 1 or start > MAX_OFFSET:
+        return []
 
-    questions = [question.format() for question in selection]
-    current_questions = questions[start:end]
+    rows = query.order_by(Question.id).limit(
+        QUESTIONS_PER_PAGE).offset(start).subquery()
+    question = func.json_build_object(
+        *(arg for field in QUESTION_FIELDS for arg in (field, rows.c[field])))
+    current_questions = db.session.execute(select(
+        func.json_agg(aggregate_order_by(question, rows.c.id),
+                      type_=JSON))).scalar()
 
-    return current_questions
+    return current_questions or []
 
 
 def create_app(test_config=None):
     # create and configure the app
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     setup_db(app)
 
     # Set up CORS. Allow '*' for origins
@@ -46,44 +177,63 @@ def create_app(test_config=None):
 
     @app.route('/categories', methods=['GET'])
     def get_categories():
-        categories = Category.query.all()
-        formatted_categories = [category.format() for category in categories]
+        formatted_categories = get_categories_cached()
+        etag = _category_cache['etag']
 
         # abort 404 if no categories found
         if (len(formatted_categories) == 0):
             abort(404)
 
-        return jsonify({
+        response = jsonify({
             "success": True,
             "categories": formatted_categories
         })
+        return cacheable(response, etag, CATEGORY_CACHE_TTL)
 
     # Get questions
 
     @app.route('/questions', methods=['GET'])
     def get_questions():
-        # get all questions and paginate
-        selection = Question.query.all()
-        total_questions = len(selection)
-        current_questions = paginate_questions(request, selection)
+        # finish whatever the session already started, then read the count
+        # and the page in one read-only transaction that commits on exit
+        db.session.commit()
+        with db.session.begin():
+            db.session.execute(text('SET TRANSACTION READ ONLY'))
+
+            # the page only changes when questions are added or removed,
+            # which always moves the count or the highest id
+            total_questions, max_id = db.session.query(
+                func.count(Question.id), func.max(Question.id)).one()
+            all_categories = get_categories_cached()
+            etag = make_etag(request.args.get('page', 1, type=int),
+                             total_questions, max_id,
+                             _category_cache['etag'])
+            not_modified = request.if_none_match.contains(etag)
+
+            # get all questions and paginate
+            if not not_modified:
+                current_questions = paginate_questions(request,
+                                                       Question.query)
+
+        if not_modified:
+            return cacheable(app.response_class(status=304), etag)
 
         # get all categories and add to dict
-        all_categories = Category.query.all()
-        categories = {}
-        for category in all_categories:
-            categories[category.id] = category.type
+        categories = {category['id']: category['type']
+                      for category in all_categories}
 
         # abort 404 if no questions
         if (len(current_questions) == 0):
             abort(404)
 
         # return data to view
-        return jsonify({
+        response = jsonify({
             'success': True,
             'questions': current_questions,
             'total_questions': total_questions,
             'categories': categories
         })
+        return cacheable(response, etag)
 
     # Delete question
 
@@ -102,7 +252,6 @@ def create_app(test_config=None):
                 {
                     "success": True,
                     "deleted": question_id,
-                    "total_questions": len(Question.query.all()),
                 }
             )
 
@@ -133,7 +282,6 @@ def create_app(test_config=None):
                 {
                     "success": True,
                     "question": question.format(),
-                    "total_questions": len(Question.query.all()),
                 }
             )
 
@@ -144,19 +292,27 @@ def create_app(test_config=None):
 
     @app.route('/questions/search', methods=['POST'])
     def search_question():
-        search_term = request.json.get('searchTerm')
-        selection = Question.query.filter(
-            Question.question.ilike(f'%{search_term}%')).all()
+        search_term = request.json.get('searchTerm', '')
+        search_term = str(search_term).translate(LIKE_ESCAPE)
+        prefix = request.args.get('prefix', 'false').lower() == 'true'
+
+        # an anchored prefix search can use the lower(question) btree index
+        if prefix:
+            selection = Question.query.filter(
+                func.lower(Question.question).like(
+                    f'{search_term.lower()}%', escape='\\'))
+        else:
+            selection = Question.query.filter(
+                Question.question.ilike(f'%{search_term}%', escape='\\'))
+        paginated = paginate_questions(request, selection)
 
-        if (len(selection) == 0):
+        if (len(paginated) == 0):
             abort(404)
 
-        paginated = paginate_questions(request, selection)
-
         return jsonify({
             'success': True,
             'questions': paginated,
-            'total_questions': len(Question.query.all())
+            'total_questions': Question.query.count()
         })
 
     # Get questions by category
@@ -171,7 +327,7 @@ def create_app(test_config=None):
             abort(400)
 
         # get the matching questions
-        selection = Question.query.filter_by(category=str(category.id)).all()
+        selection = Question.query.filter_by(category=category.id)
 
         # paginate the selection
         paginated = paginate_questions(request, selection)
@@ -180,7 +336,7 @@ def create_app(test_config=None):
         return jsonify({
             'success': True,
             'questions': paginated,
-            'total_questions': len(Question.query.all()),
+            'total_questions': Question.query.count(),
             'current_category': category.type
         })
 
@@ -197,11 +353,76 @@ def create_app(test_config=None):
         if not quiz_category:
             return abort(400, 'Required keys missing from request body')
         category_id = int(quiz_category.get('id'))
-        questions = Question.query.filter(
-            Question.category == category_id,
-            ~Question.id.in_(previous_questions)) if category_id else \
-            Question.query.filter(~Question.id.in_(previous_questions))
-        question = questions.order_by(func.random()).first()
+        previous_questions = previous_questions or []
+        if not (isinstance(previous_questions, list) and all(
+                is_int(question_id) and
+                INTEGER_MIN <= question_id <= INTEGER_MAX
+                for question_id in previous_questions)):
+            return abort(400, 'Invalid previous questions')
+
+        # a quiz cursor replaces the growing previous_questions list: the
+        # client sends back the seed, position and category it was given,
+        # and the seed maps each position to a distinct question offset.
+        # The mapping depends on how many questions the category has, so
+        # adding or deleting questions mid-quiz can reorder the run and
+        # repeat a question.
+        quiz_cursor = request.json.get('quiz_cursor')
+        if quiz_cursor is not None or not previous_questions:
+            if quiz_cursor is None:
+                quiz_cursor = {'seed': random.getrandbits(32), 'index': 0,
+                               'category_id': category_id}
+            if not isinstance(quiz_cursor, dict):
+                return abort(400, 'Invalid quiz cursor')
+            seed = quiz_cursor.get('seed')
+            index = quiz_cursor.get('index')
+            if not (is_int(seed) and is_int(index) and index >= 0
+                    and quiz_cursor.get('category_id') == category_id):
+                return abort(400, 'Invalid quiz cursor')
+
+            stmt = lambda_stmt(lambda: select(func.count(Question.id)))
+            if category_id:
+                stmt += lambda s: s.where(Question.category == category_id)
+            total = db.session.execute(stmt).scalar()
+            if index >= total:
+                return jsonify({})
+
+            offset = quiz_position(seed, index, total)
+            stmt = lambda_stmt(lambda: select(Question))
+            if category_id:
+                stmt += lambda s: s.where(Question.category == category_id)
+            stmt += lambda s: s.order_by(Question.id).offset(offset).limit(1)
+            question = db.session.execute(stmt).scalars().first()
+            if not question:
+                return jsonify({})
+            return jsonify({
+                'question': question.format(),
+                'quiz_cursor': {'seed': seed, 'index': index + 1,
+                                'category_id': category_id}
+            })
+
+        # lambda statements are compiled once and reused across requests,
+        # with the closure variables bound as parameters. The previous ids
+        # go in as one integer array, so the SQL text does not change with
+        # the number of questions already played.
+        previous = bindparam('previous_questions', previous_questions,
+                             type_=ARRAY(Integer))
+
+        def candidates(stmt):
+            stmt += lambda s: s.where(Question.id != all_(previous))
+            if category_id:
+                stmt += lambda s: s.where(Question.category == category_id)
+            return stmt
+
+        # pick a random offset instead of ORDER BY random(), which would
+        # sort every candidate row
+        total = db.session.execute(candidates(
+            lambda_stmt(lambda: select(func.count(Question.id))))).scalar()
+        if total == 0:
+            return jsonify({})
+        offset = random.randrange(total)
+        stmt = candidates(lambda_stmt(lambda: select(Question)))
+        stmt += lambda s: s.order_by(Question.id).offset(offset).limit(1)
+        question = db.session.execute(stmt).scalars().first()
         if not question:
             return jsonify({})
         return jsonify({
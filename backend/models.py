@@ -1,6 +1,8 @@
-from sqlalchemy import Column, String, Integer, create_engine
+from sqlalchemy import Column, String, Integer, create_engine, DDL, \
+    ForeignKey, Index, event, func
 from flask_sqlalchemy import SQLAlchemy
-from settings import DB_NAME, DB_USER, DB_PASSWORD
+from settings import DB_NAME, DB_USER, DB_PASSWORD, DB_POOL_SIZE, \
+    DB_MAX_OVERFLOW
 
 database_path = "postgresql://{}:{}@{}/{}".format(
     DB_USER, DB_PASSWORD, "localhost:5432", DB_NAME
@@ -17,6 +19,14 @@ setup_db(app)
 def setup_db(app, database_path=database_path):
     app.config["SQLALCHEMY_DATABASE_URI"] = database_path
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # size the pool to workers x threads per worker; recycle and pre-ping
+    # so stale connections are replaced before a request uses them
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": 3600,
+        "pool_pre_ping": True,
+    }
     db.app = app
     db.init_app(app)
     db.create_all()
@@ -34,7 +44,9 @@ class Question(db.Model):
     id = Column(Integer, primary_key=True)
     question = Column(String)
     answer = Column(String)
-    category = Column(String)
+    category = Column(Integer, ForeignKey('categories.id',
+                                          onupdate='CASCADE',
+                                          ondelete='SET NULL'))
     difficulty = Column(Integer)
 
     def __init__(self, question, answer, category, difficulty):
@@ -64,6 +76,27 @@ class Question(db.Model):
         }
 
 
+# trigram index so ILIKE '%term%' searches avoid a sequential scan
+Index('questions_question_trgm', Question.question,
+      postgresql_using='gin',
+      postgresql_ops={'question': 'gin_trgm_ops'})
+
+# btree index serving anchored lower(question) LIKE 'term%' searches
+Index('questions_question_prefix',
+      func.lower(Question.question).label('question_lower'),
+      postgresql_ops={'question_lower': 'text_pattern_ops'})
+
+# composite index backing per-category quiz sampling ordered by id
+Index('questions_category_id', Question.category, Question.id)
+
+event.listen(
+    Question.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(
+        dialect='postgresql')
+)
+
+
 """
 Category
 
@@ -78,6 +78,22 @@ class TriviaTestCase(unittest.TestCase):
         self.assertEqual(data["success"], False)
         self.assertEqual(data["message"], "resource not found")
 
+    def test_404_sent_requesting_page_zero(self):
+        res = self.client().get("/questions?page=0")
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(data["success"], False)
+        self.assertEqual(data["message"], "resource not found")
+
+    def test_404_sent_requesting_oversized_page(self):
+        res = self.client().get("/questions?page=99999999999999999999")
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(data["success"], False)
+        self.assertEqual(data["message"], "resource not found")
+
     def test_search_questions(self):
         res = self.client().post('/questions/search',
                                  json={'searchTerm': 'IDE'})
@@ -88,6 +104,17 @@ class TriviaTestCase(unittest.TestCase):
         self.assertEqual(data['success'], True)
         self.assertNotEqual(len(data['questions']), 0)
 
+    def test_search_questions_by_prefix(self):
+        res = self.client().post('/questions/search?prefix=true',
+                                 json={'searchTerm': 'who'})
+
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['success'], True)
+        for question in data['questions']:
+            self.assertTrue(question['question'].lower().startswith('who'))
+
     def test_404_if_search_questions_fails(self):
         res = self.client().post('/questions/search',
                                  json={'searchTerm': 'IE90764vgjkloo'})
@@ -98,6 +125,17 @@ class TriviaTestCase(unittest.TestCase):
         self.assertEqual(data["success"], False)
         self.assertEqual(data["message"], "resource not found")
 
+    def test_404_if_search_term_is_like_wildcard(self):
+        for search_term in ('%', '_'):
+            res = self.client().post('/questions/search',
+                                     json={'searchTerm': search_term})
+
+            data = json.loads(res.data)
+
+            self.assertEqual(res.status_code, 404)
+            self.assertEqual(data["success"], False)
+            self.assertEqual(data["message"], "resource not found")
+
     def test_delete_question(self):
         res = self.client().delete("/questions/2")
         data = json.loads(res.data)
@@ -107,7 +145,6 @@ class TriviaTestCase(unittest.TestCase):
         self.assertEqual(res.status_code, 200)
         self.assertEqual(data["success"], True)
         self.assertEqual(data["deleted"], 2)
-        self.assertTrue(data["total_questions"])
         self.assertEqual(question, None)
 
     def test_404_if_delete_question_fails(self):
@@ -127,6 +164,56 @@ class TriviaTestCase(unittest.TestCase):
         self.assertTrue(data["categories"])
         self.assertTrue(len(data["categories"]))
 
+    def test_304_if_categories_not_modified(self):
+        res = self.client().get("/categories")
+        etag = res.headers["ETag"]
+
+        res = self.client().get("/categories",
+                                headers={"If-None-Match": etag})
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_304_if_questions_not_modified(self):
+        res = self.client().get("/questions")
+        etag = res.headers["ETag"]
+
+        res = self.client().get("/questions",
+                                headers={"If-None-Match": etag})
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_questions_etag_changes_after_create_and_delete(self):
+        etag = self.client().get("/questions").headers["ETag"]
+
+        res = self.client().post("/questions", json=self.new_question)
+        question_id = json.loads(res.data)["question"]["id"]
+        created_etag = self.client().get("/questions").headers["ETag"]
+
+        self.assertNotEqual(created_etag, etag)
+
+        self.client().delete(f"/questions/{question_id}")
+        res = self.client().get("/questions",
+                                headers={"If-None-Match": created_etag})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers["ETag"], created_etag)
+
+    def test_json_responses_decode_to_same_payload(self):
+        payload = {"success": True,
+                   "categories": {1: "Science", 2: "Art"},
+                   "questions": [{"id": 1, "question": "Who?"}]}
+        expected = json.loads(json.dumps(payload))
+
+        with self.app.app_context():
+            res = self.app.json.response(payload)
+
+        self.assertEqual(res.mimetype, "application/json")
+        self.assertEqual(json.loads(res.data), expected)
+        self.assertEqual(
+            json.loads(self.app.json.dumps(payload, indent=2)), expected)
+        with self.assertRaises(TypeError):
+            self.app.json.dumps(payload, separators=(",", ":"))
+
     def test_get_questions_by_category(self):
         res = self.client().get('/categories/1/questions')
 
@@ -162,6 +249,89 @@ class TriviaTestCase(unittest.TestCase):
             self.assertNotIn(data['question']['id'],
                              request_data['previous_questions'])
 
+    def test_play_quiz_with_cursor(self):
+        request_data = {
+            'previous_questions': [],
+            'quiz_category': {'id': 1, 'type': 'Science'}
+        }
+        res = self.client().post('/quizzes', json=request_data)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['question'])
+        self.assertEqual(data['quiz_cursor']['index'], 1)
+
+        request_data['quiz_cursor'] = data['quiz_cursor']
+        res = self.client().post('/quizzes', json=request_data)
+        next_data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(next_data['question']['id'],
+                            data['question']['id'])
+        self.assertEqual(next_data['quiz_cursor']['index'], 2)
+
+    def test_play_quiz_cursor_past_last_question(self):
+        res = self.client().post('/quizzes', json={
+            'previous_questions': [],
+            'quiz_category': {'id': 1, 'type': 'Science'},
+            'quiz_cursor': {'seed': 1, 'index': 2 ** 63, 'category_id': 1}
+        })
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data, {})
+
+    def test_400_if_quiz_cursor_invalid(self):
+        res = self.client().post('/quizzes', json={
+            'previous_questions': [],
+            'quiz_category': {'id': 1, 'type': 'Science'},
+            'quiz_cursor': {'seed': 'abc', 'index': -1}
+        })
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(data['success'], False)
+        self.assertEqual(data['message'], 'bad request')
+
+    def test_400_if_quiz_cursor_not_object(self):
+        res = self.client().post('/quizzes', json={
+            'previous_questions': [],
+            'quiz_category': {'id': 1, 'type': 'Science'},
+            'quiz_cursor': 'abc'
+        })
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(data['success'], False)
+        self.assertEqual(data['message'], 'bad request')
+
+    def test_400_if_quiz_cursor_category_changes(self):
+        res = self.client().post('/quizzes', json={
+            'previous_questions': [],
+            'quiz_category': {'id': 1, 'type': 'Science'}
+        })
+        data = json.loads(res.data)
+
+        res = self.client().post('/quizzes', json={
+            'previous_questions': [],
+            'quiz_category': {'id': 2, 'type': 'Art'},
+            'quiz_cursor': data['quiz_cursor']
+        })
+
+        self.assertEqual(res.status_code, 400)
+
+    def test_400_if_previous_questions_invalid(self):
+        for previous_questions in ([3000000000], [True], [1.5], ['1']):
+            res = self.client().post('/quizzes', json={
+                'previous_questions': previous_questions,
+                'quiz_category': {'id': 1, 'type': 'Science'}
+            })
+            data = json.loads(res.data)
+
+            self.assertEqual(res.status_code, 400)
+            self.assertEqual(data['success'], False)
+            self.assertEqual(data['message'], 'bad request')
+
     def test_play_quiz_fails(self):
         res = self.client().post('/quizzes', json={})
 
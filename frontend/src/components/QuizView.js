@@ -10,6 +10,7 @@ class QuizView extends Component {
     this.state = {
       quizCategory: null,
       previousQuestions: [],
+      quizCursor: null,
       showAnswer: false,
       categories: {},
       numCorrect: 0,
@@ -56,6 +57,7 @@ class QuizView extends Component {
       data: JSON.stringify({
         previous_questions: previousQuestions,
         quiz_category: this.state.quizCategory,
+        quiz_cursor: this.state.quizCursor,
       }),
       xhrFields: {
         withCredentials: true,
@@ -65,6 +67,7 @@ class QuizView extends Component {
         this.setState({
           showAnswer: false,
           previousQuestions: previousQuestions,
+          quizCursor: result.quiz_cursor || null,
           currentQuestion: result.question,
           guess: '',
           forceEnd: result.question ? false : true,
@@ -91,6 +94,7 @@ class QuizView extends Component {
     this.setState({
       quizCategory: null,
       previousQuestions: [],
+      quizCursor: null,
       showAnswer: false,
       numCorrect: 0,
       currentQuestion: {},